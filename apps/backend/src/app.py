@@ -1,27 +1,77 @@
-from flask import Flask, request, jsonify, send_from_directory, Response
+from flask import Flask, request, jsonify, send_from_directory, Response, abort, current_app
 from flask_cors import CORS
 import os
-import uuid
-import magic
-from PIL import Image
+import re
+import mimetypes
+import numpy as np
+import orjson
+from io import BytesIO
+from PIL import Image, features
+from streaming_form_data import StreamingFormDataParser
+from streaming_form_data.parser import ParseFailedException
+from streaming_form_data.targets import BaseTarget, FileTarget
+from werkzeug.exceptions import HTTPException
+from werkzeug.security import safe_join
 from werkzeug.utils import secure_filename
 from datetime import datetime
 
 
-from .models import db, init_db, ImageModel, AnnotationModel
+from .models import db, init_db, ImageModel
+from .services.annotation_service import AnnotationService
+from .services.file_service import FileService
+from .utils import read_dimensions, detect_mime, ojson
 from .config.settings import (
     UPLOAD_FOLDER, 
     ALLOWED_EXTENSIONS, 
+    ALLOWED_MIME_TYPES,
     MAX_CONTENT_LENGTH,
     CORS_ORIGINS,
+    USE_X_ACCEL_REDIRECT,
+    X_ACCEL_UPLOADS_LOCATION,
     SECRET_KEY,
     SQLALCHEMY_DATABASE_URI,
     SQLALCHEMY_TRACK_MODIFICATIONS
 )
 
+# Large chunks keep the read()/write() syscall count per upload low
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+UPLOAD_HEAD_SIZE = 64 * 1024
+MIME_SNIFF_SIZE = 4 * 1024
 
-def create_app():
-    """Application factory pattern."""
+ALLOWED_EXTENSION_RE = re.compile(
+    r'\.(?:%s)\Z' % '|'.join(sorted(ALLOWED_EXTENSIONS)), re.IGNORECASE
+)
+
+
+class HeadTarget(BaseTarget):
+    """Streaming target that keeps only the first ``size`` bytes of a part."""
+    
+    def __init__(self, size=UPLOAD_HEAD_SIZE):
+        super().__init__()
+        self._size = size
+        self._chunks = []
+        self._received = 0
+        self.finished = False
+    
+    def on_data_received(self, chunk):
+        if self._received < self._size:
+            chunk = chunk[:self._size - self._received]
+            self._chunks.append(chunk)
+            self._received += len(chunk)
+    
+    def on_finish(self):
+        self.finished = True
+    
+    @property
+    def value(self):
+        return b''.join(self._chunks)
+
+
+def create_app(test_config=None):
+    """Application factory pattern.
+    
+    Values in ``test_config`` override the settings-based configuration.
+    """
     app = Flask(__name__)
     
     app.config['SQLALCHEMY_DATABASE_URI'] = SQLALCHEMY_DATABASE_URI
@@ -30,12 +80,24 @@ def create_app():
     app.config['SECRET_KEY'] = SECRET_KEY
     app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
     
+    if test_config is not None:
+        app.config.update(test_config)
+    
     db.init_app(app)
     CORS(app, origins=CORS_ORIGINS)
     
     with app.app_context():
         init_db()
     
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create tables and indexes even if the schema looks current."""
+        init_db(force=True)
+    
+    # Pillow wheels bundle libjpeg-turbo; a source build may link plain libjpeg
+    if not features.check('libjpeg_turbo'):
+        print("⚠️ Pillow is not linked against libjpeg-turbo; JPEG decoding will be slower")
+    
     register_routes(app)
     
     return app
@@ -56,7 +118,17 @@ def register_routes(app):
     @app.route('/uploads/<filename>')
     def uploaded_file(filename):
         """Serve uploaded files."""
-        return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+        if USE_X_ACCEL_REDIRECT:
+            # nginx streams the file from disk with sendfile()
+            file_path = safe_join(app.config['UPLOAD_FOLDER'], filename)
+            if file_path is None or not os.path.isfile(file_path):
+                abort(404)
+            return Response(
+                mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+                headers={'X-Accel-Redirect': X_ACCEL_UPLOADS_LOCATION + filename}
+            )
+        
+        return send_from_directory(app.config['UPLOAD_FOLDER'], filename, conditional=True)
     
     @app.route('/images/', methods=['GET', 'POST'])
     def handle_images():
@@ -79,53 +151,20 @@ def register_routes(app):
         """Download annotations in specified format."""
         format_type = request.args.get('format', 'json')
         
-        annotations = AnnotationModel.get_annotations(image_id)
         image = ImageModel.get_by_id(image_id)
         
         if not image:
             return jsonify({'error': 'Image not found'}), 404
         
         if format_type == 'coco':
-            coco_data = {
-                "images": [
-                    {
-                        "id": image_id,
-                        "width": image.get('width', 0),
-                        "height": image.get('height', 0),
-                        "file_name": image['filename']
-                    }
-                ],
-                "annotations": [],
-                "categories": []
-            }
-            
-            categories = {}
-            category_id = 1
-            
-            for i, ann in enumerate(annotations):
-                label = ann.get('label', 'object')
-                
-                if label not in categories:
-                    categories[label] = category_id
-                    coco_data["categories"].append({
-                        "id": category_id,
-                        "name": label,
-                        "supercategory": "thing"
-                    })
-                    category_id += 1
-                
-                if ann.get('type') == 'box':
-                    coco_data["annotations"].append({
-                        "id": i + 1,
-                        "image_id": image_id,
-                        "category_id": categories[label],
-                        "bbox": [ann['x'], ann['y'], ann['w'], ann['h']],
-                        "area": ann['w'] * ann['h'],
-                        "iscrowd": 0
-                    })
+            annotations = AnnotationService.get_export_annotations(image_id)
+            try:
+                boxes = box_array(annotations)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
             
             response = Response(
-                jsonify(coco_data).get_data(as_text=True),
+                stream_coco(image_id, image, annotations, boxes),
                 mimetype='application/json',
                 headers={'Content-Disposition': f'attachment; filename=coco_annotations_{image_id}.json'}
             )
@@ -138,33 +177,13 @@ def register_routes(app):
             if image_width <= 0 or image_height <= 0:
                 return jsonify({'error': 'Image dimensions required for YOLO format'}), 400
             
-            yolo_lines = []
-            categories = {}
-            category_id = 0
+            annotations = AnnotationService.get_export_annotations(image_id)
+            try:
+                boxes = box_array(annotations)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
             
-            for ann in annotations:
-                if ann.get('type') == 'box':
-                    label = ann.get('label', 'object')
-                    
-                    if label not in categories:
-                        categories[label] = category_id
-                        category_id += 1
-                    
-                    class_id = categories[label]
-                    
-                    x = ann['x']
-                    y = ann['y']
-                    w = ann['w']
-                    h = ann['h']
-                    
-                    center_x = (x + w/2) / image_width
-                    center_y = (y + h/2) / image_height
-                    width_norm = w / image_width
-                    height_norm = h / image_height
-                    
-                    yolo_lines.append(f"{class_id} {center_x:.6f} {center_y:.6f} {width_norm:.6f} {height_norm:.6f}")
-            
-            yolo_content = '\n'.join(yolo_lines)
+            yolo_content = format_yolo(annotations, boxes, image_width, image_height)
             
             response = Response(
                 yolo_content,
@@ -174,47 +193,153 @@ def register_routes(app):
             return response
             
         else:
-            return jsonify({
+            # Annotations arrive already encoded; embed them without re-parsing
+            return ojson({
                 'image': image,
-                'annotations': annotations
+                'annotations': orjson.Fragment(AnnotationService.get_annotations_json(image_id))
             })
 
 
+def box_array(annotations):
+    """Stack x, y, w, h of the box annotations into an (n, 4) array.
+    
+    The array is integer when every coordinate is, so integer boxes and
+    areas export as integers. Raises ValueError when a box coordinate is not
+    a number, so exports can reject bad data before any of the response
+    has been sent.
+    """
+    rows = [
+        [ann['x'], ann['y'], ann['w'], ann['h']]
+        for ann in annotations if ann.get('type') == 'box'
+    ]
+    integral = True
+    for row in rows:
+        for value in row:
+            if isinstance(value, float):
+                integral = False
+            elif not isinstance(value, int):
+                raise ValueError('Box coordinates must be numbers')
+    
+    if integral:
+        try:
+            return np.asarray(rows, dtype=np.int64).reshape(-1, 4)
+        except OverflowError:
+            pass
+    return np.asarray(rows, dtype=np.float64).reshape(-1, 4)
+
+
+def stream_coco(image_id, image, annotations, boxes):
+    """Yield a COCO export document chunk by chunk.
+    
+    Annotations are encoded one at a time as the response body is consumed,
+    so the full COCO dict is never built in memory. ``boxes`` comes from
+    ``box_array`` and is checked before streaming starts; orjson serializes
+    its rows natively. Categories are collected along the way and written last.
+    """
+    yield b'{"images":' + orjson.dumps([
+        {
+            "id": image_id,
+            "width": image.get('width', 0),
+            "height": image.get('height', 0),
+            "file_name": image['filename']
+        }
+    ]) + b',"annotations":['
+    
+    areas = boxes[:, 2] * boxes[:, 3]
+    
+    categories = {}
+    separator = b''
+    box_index = 0
+    
+    for i, ann in enumerate(annotations):
+        label = ann.get('label', 'object')
+        
+        if label not in categories:
+            categories[label] = len(categories) + 1
+        
+        if ann.get('type') == 'box':
+            yield separator + orjson.dumps({
+                "id": i + 1,
+                "image_id": image_id,
+                "category_id": categories[label],
+                "bbox": boxes[box_index],
+                "area": areas[box_index],
+                "iscrowd": 0
+            }, option=orjson.OPT_SERIALIZE_NUMPY)
+            separator = b','
+            box_index += 1
+    
+    yield b'],"categories":' + orjson.dumps([
+        {
+            "id": category_id,
+            "name": label,
+            "supercategory": "thing"
+        }
+        for label, category_id in categories.items()
+    ]) + b'}'
+
+
+def format_yolo(annotations, boxes, image_width, image_height):
+    """Format box annotations as YOLO label lines.
+    
+    Box centers and sizes are normalized for all ``boxes`` (from
+    ``box_array``) at once with NumPy instead of one annotation at a time.
+    """
+    box_anns = [ann for ann in annotations if ann.get('type') == 'box']
+    
+    categories = {}
+    class_ids = [
+        categories.setdefault(ann.get('label', 'object'), len(categories))
+        for ann in box_anns
+    ]
+    
+    scale = np.array([image_width, image_height], dtype=np.float64)
+    
+    rows = np.column_stack((
+        np.asarray(class_ids, dtype=np.float64),
+        (boxes[:, :2] + boxes[:, 2:] / 2) / scale,
+        boxes[:, 2:] / scale
+    ))
+    
+    return '\n'.join('%d %.6f %.6f %.6f %.6f' % tuple(row) for row in rows.tolist())
+
+
 def upload_image(app):
     """Handle image upload."""
-    if 'file' not in request.files:
+    if request.mimetype != 'multipart/form-data':
         return jsonify({'error': 'No file provided'}), 400
     
-    file = request.files['file']
-    if file.filename == '':
-        return jsonify({'error': 'No file selected'}), 400
-    
-    if not allowed_file(file.filename):
-        return jsonify({'error': 'File type not allowed'}), 400
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    temp_path = os.path.join(app.config['UPLOAD_FOLDER'], f".upload_{os.urandom(8).hex()}")
     
     try:
-        original_filename = secure_filename(file.filename)
-        timestamp = str(uuid.uuid4())
-        name, ext = os.path.splitext(original_filename)
-        unique_filename = f"{name}_{timestamp}{ext}"
+        try:
+            target, head = stream_upload(temp_path)
+        except ParseFailedException:
+            # Malformed or truncated multipart body
+            return jsonify({'error': 'No file provided'}), 400
         
-        os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
+        if target.multipart_filename is None:
+            return jsonify({'error': 'No file provided'}), 400
+        
+        if target.multipart_filename == '':
+            return jsonify({'error': 'No file selected'}), 400
         
-        file.save(file_path)
+        if not allowed_file(target.multipart_filename):
+            return jsonify({'error': 'File type not allowed'}), 400
         
-        mime_type = magic.from_file(file_path, mime=True)
-        allowed_mime_types = ['image/jpeg', 'image/png', 'image/gif', 'image/webp']
+        original_filename = secure_filename(target.multipart_filename)
+        unique_filename = FileService.generate_unique_filename(original_filename)
         
-        if mime_type not in allowed_mime_types:
-            os.remove(file_path)
+        file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
+        
+        mime_type = detect_mime(head[:MIME_SNIFF_SIZE])
+        if mime_type not in ALLOWED_MIME_TYPES:
             return jsonify({'error': 'Invalid file type detected'}), 400
         
-        try:
-            with Image.open(file_path) as img:
-                width, height = img.size
-        except Exception:
-            width, height = None, None
+        os.replace(temp_path, file_path)
+        
+        width, height = image_dimensions(head, file_path)
         
         image_data = ImageModel.create(
             filename=unique_filename,
@@ -224,17 +349,98 @@ def upload_image(app):
             height=height
         )
         
-        return jsonify(image_data), 201
+        return ojson(image_data), 201
         
+    except HTTPException:
+        raise
     except Exception as e:
         return jsonify({'error': f'Upload failed: {str(e)}'}), 500
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def stream_upload(destination):
+    """Stream the multipart request body straight to disk.
+    
+    Reads ``request.stream`` in fixed-size chunks and feeds them to the
+    streaming-form-data parser, so the ``file`` part is written once to
+    ``destination`` without Werkzeug's per-line parsing or temp file.
+    The first bytes of the part are kept in memory for validation.
+    Raises ParseFailedException if the body is malformed or ends before
+    the file part does.
+    """
+    parser = StreamingFormDataParser(headers=request.headers)
+    target = FileTarget(destination)
+    head = HeadTarget()
+    parser.register('file', target)
+    parser.register('file', head)
+    
+    while True:
+        chunk = request.stream.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        parser.data_received(chunk)
+    
+    if target.multipart_filename is not None and not head.finished:
+        raise ParseFailedException('File part is incomplete')
+    
+    return target, head.value
+
+
+def image_dimensions(head, file_path):
+    """Get image width and height, preferring the buffered upload prefix.
+    
+    PNG, JPEG, GIF and WebP sizes are read directly from their header
+    bytes. Anything else goes through ``Image.open``, which only parses the
+    header, so the prefix is usually enough; the saved file is only re-read
+    when the header lies beyond it.
+    """
+    dimensions = read_dimensions(head)
+    if dimensions:
+        return dimensions
+    
+    for source in (BytesIO(head), file_path):
+        try:
+            with Image.open(source) as img:
+                return img.size
+        except Exception:
+            continue
+    return None, None
 
 
 def get_images():
-    """Get all images."""
+    """Get all images, or one page of them with ?limit=&cursor=."""
     try:
-        images = ImageModel.get_all()
-        return jsonify(images)
+        if request.args.get('include') == 'annotations':
+            return ojson(ImageModel.get_all_with_annotations())
+        
+        limit = request.args.get('limit', type=int)
+        cursor_id = request.args.get('cursor', type=int)
+        paged = limit is not None or cursor_id is not None
+        
+        etag = ImageModel.get_list_version()
+        if paged:
+            etag = f'{etag}-{limit}-{cursor_id}'
+        
+        if etag in request.if_none_match:
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+        
+        # Only the full list is cached, per app as (etag, body); pages are
+        # cheap to rebuild
+        cached = None if paged else current_app.extensions.get('images_body')
+        if cached and cached[0] == etag:
+            body = cached[1]
+        else:
+            body = orjson.dumps(ImageModel.get_all(limit=limit, cursor_id=cursor_id))
+            if not paged:
+                current_app.extensions['images_body'] = (etag, body)
+        
+        response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -246,7 +452,7 @@ def save_annotations(image_id):
         if not isinstance(annotations_data, list):
             return jsonify({'error': 'Annotations must be a list'}), 400
         
-        AnnotationModel.save_annotations(image_id, annotations_data)
+        AnnotationService.save_annotations(image_id, annotations_data)
         return jsonify({'status': 'success'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -255,15 +461,16 @@ def save_annotations(image_id):
 def get_annotations(image_id):
     """Get annotations for an image."""
     try:
-        annotations = AnnotationModel.get_annotations(image_id)
-        return jsonify(annotations)
+        return Response(
+            AnnotationService.get_annotations_json(image_id),
+            mimetype='application/json'
+        )
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 def allowed_file(filename):
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    return ALLOWED_EXTENSION_RE.search(filename) is not None
 
 
 if __name__ == '__main__':
@@ -11,10 +11,11 @@ In a production environment, you would want to:
 """
 
 import jwt
-import hashlib
+import time
 from datetime import datetime, timedelta
-from functools import wraps
+from functools import lru_cache, wraps
 from flask import request, jsonify, current_app
+from werkzeug.security import generate_password_hash, check_password_hash
 
 # Mock user database (in production, use a real database)
 MOCK_USERS = {
@@ -22,7 +23,7 @@ MOCK_USERS = {
         "id": 1,
         "username": "admin",
         "email": "admin@example.com",
-        "password_hash": "240be518fabd2724ddb6f04eeb1da5967448d7e831c08c8fa822809f74c720a9",  # "admin123"
+        "password_hash": "scrypt:32768:8:1$4qisQc1NPzGdHoQv$471a5fb7de7e0e3b3d9419cb870fa0257d30f689febe630fd872c5f7a37870d58175992ec22f712d91f98d2bdb20636e106b3a1ee4012279bf7e2d9e544c6730",  # "admin123"
         "role": "admin",
         "created_at": "2023-01-01T00:00:00Z"
     },
@@ -30,29 +31,47 @@ MOCK_USERS = {
         "id": 2,
         "username": "user",
         "email": "user@example.com", 
-        "password_hash": "04f8996da763b7a969b1028ee3007569eaf3a635486ddab211d512c85b9df8fb",  # "user123"
+        "password_hash": "scrypt:32768:8:1$6QEJEF5a7VhlahcP$7f2aa2eed6685d391be31ff00435a1a99dd8339109801a28058e461f715d8ffe70d161a583dbc358a491805ea9cdb2593a0e09272b3ddb27cbf5e0f94ca1b293",  # "user123"
         "role": "user",
         "created_at": "2023-01-01T00:00:00Z"
     }
 }
 
 # JWT Configuration (in production, use environment variables)
+# HS256 signing goes through hashlib/OpenSSL; OpenSSL >= 1.1.1 uses the
+# SHA-NI instructions on CPUs that have them.
 JWT_SECRET_KEY = "your-super-secret-jwt-key-change-this-in-production"
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION_HOURS = 24
+JWT_CACHE_SIZE = 4096
+
+# Built once and reused for every encode/decode
+_JWT_CODEC = jwt.PyJWT()
+_JWT_KEY = JWT_SECRET_KEY.encode()
+
+
+@lru_cache(maxsize=JWT_CACHE_SIZE)
+def _decode_token(token: str) -> dict:
+    """Decode and verify a JWT, memoized per raw token string.
+    
+    Only successful decodes are cached; expiry is re-checked by the caller
+    on every hit.
+    """
+    return _JWT_CODEC.decode(token, _JWT_KEY, algorithms=[JWT_ALGORITHM])
+
 
 class AuthService:
     """Authentication service for JWT token management."""
     
     @staticmethod
     def hash_password(password: str) -> str:
-        """Hash password using SHA-256 (in production, use bcrypt or similar)."""
-        return hashlib.sha256(password.encode()).hexdigest()
+        """Hash password using salted scrypt."""
+        return generate_password_hash(password, method="scrypt")
     
     @staticmethod
     def verify_password(password: str, password_hash: str) -> bool:
         """Verify password against hash."""
-        return AuthService.hash_password(password) == password_hash
+        return check_password_hash(password_hash, password)
     
     @staticmethod
     def generate_token(user_data: dict) -> str:
@@ -66,18 +85,23 @@ class AuthService:
             "iat": datetime.utcnow()
         }
         
-        return jwt.encode(payload, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
+        return _JWT_CODEC.encode(payload, _JWT_KEY, algorithm=JWT_ALGORITHM)
     
     @staticmethod
     def verify_token(token: str) -> dict:
         """Verify and decode JWT token."""
         try:
-            payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
-            return payload
+            payload = _decode_token(token)
         except jwt.ExpiredSignatureError:
             raise Exception("Token has expired")
         except jwt.InvalidTokenError:
             raise Exception("Invalid token")
+        
+        exp = payload.get("exp")
+        if exp is not None and exp <= time.time():
+            raise Exception("Token has expired")
+        
+        return dict(payload)
     
     @staticmethod
     def authenticate_user(username: str, password: str) -> dict:
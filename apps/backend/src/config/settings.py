@@ -20,9 +20,14 @@ UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', os.path.join(PROJECT_ROOT, 'stor
 
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+ALLOWED_EXTENSIONS = frozenset({'png', 'jpg', 'jpeg', 'gif', 'webp'})
+ALLOWED_MIME_TYPES = frozenset({'image/jpeg', 'image/png', 'image/gif', 'image/webp'})
 MAX_CONTENT_LENGTH = 10 * 1024 * 1024
 
+# When uploads are only reached through nginx, let it send the file itself
+USE_X_ACCEL_REDIRECT = os.environ.get('USE_X_ACCEL_REDIRECT', 'false').lower() == 'true'
+X_ACCEL_UPLOADS_LOCATION = '/protected-uploads/'
+
 SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', f'sqlite:///{os.path.join(PROJECT_ROOT, "storage", "database", "app.db")}')
 SQLALCHEMY_TRACK_MODIFICATIONS = False
 
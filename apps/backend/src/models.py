@@ -1,6 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
-import json
+import orjson
 
 db = SQLAlchemy()
 
@@ -16,7 +16,10 @@ class ImageModel(db.Model):
     height = db.Column(db.Integer)
     upload_time = db.Column(db.DateTime, default=datetime.utcnow)
     
-    annotations = db.relationship('AnnotationModel', backref='image', cascade='all, delete-orphan')
+    annotations = db.relationship(
+        'AnnotationModel', backref='image', cascade='all, delete-orphan',
+        order_by='[AnnotationModel.created_at, AnnotationModel.id]'
+    )
     
     def to_dict(self):
         """Convert model to dictionary."""
@@ -54,6 +57,9 @@ class ImageModel(db.Model):
 class AnnotationModel(db.Model):
     """Model for storing annotation data."""
     __tablename__ = 'annotations'
+    __table_args__ = (
+        db.Index('ix_ann_image_created', 'image_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     image_id = db.Column(db.Integer, db.ForeignKey('images.id'), nullable=False)
@@ -64,35 +70,43 @@ class AnnotationModel(db.Model):
     @classmethod
     def get_annotations(cls, image_id):
         """Get all annotations for an image."""
-        annotations = cls.query.filter_by(image_id=image_id).all()
+        rows = db.session.execute(
+            db.select(cls.id, cls.annotation_type, cls.data)
+            .where(cls.image_id == image_id)
+            .order_by(cls.created_at, cls.id)
+        ).all()
         result = []
-        for ann in annotations:
+        for ann in rows:
             try:
-                data = json.loads(ann.data)
+                data = orjson.loads(ann.data)
                 data['type'] = ann.annotation_type
                 if 'id' not in data:
                     data['id'] = str(ann.id)
                 result.append(data)
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 continue
         return result
     
     @classmethod
     def save_annotations(cls, image_id, annotations):
         """Save annotations for an image."""
-        cls.query.filter_by(image_id=image_id).delete()
+        rows = [
+            {
+                'image_id': image_id,
+                'annotation_type': annotation.pop('type'),
+                'data': orjson.dumps(annotation).decode()
+            }
+            for annotation in annotations
+        ]
         
-        for annotation in annotations:
-            annotation_type = annotation.pop('type')
-            
-            new_annotation = cls(
-                image_id=image_id,
-                annotation_type=annotation_type,
-                data=json.dumps(annotation)
-            )
-            db.session.add(new_annotation)
+        try:
+            cls.query.filter_by(image_id=image_id).delete()
+            db.session.bulk_insert_mappings(cls, rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
         
-        db.session.commit()
         return {'status': 'success'}
 
 
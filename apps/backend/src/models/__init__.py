@@ -7,10 +7,10 @@ This module contains all database models for the image annotation application.
 
 from .image import ImageModel, Images
 from .annotation import AnnotationModel, Annotations
-from .database import db, init_db
+from .database import db, init_db, current_timestamp, raw_conn
 
 __all__ = [
     'ImageModel', 'Images',
     'AnnotationModel', 'Annotations', 
-    'db', 'init_db'
+    'db', 'init_db', 'current_timestamp', 'raw_conn'
 ] 
\ No newline at end of file
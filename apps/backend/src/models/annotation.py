@@ -5,13 +5,17 @@ Annotation Model
 This module contains the Annotation model and related database operations.
 """
 
-import json
-from datetime import datetime
+import orjson
 from .database import db
 
 class Annotations(db.Model):
     """Flask-SQLAlchemy model for annotations table."""
     __tablename__ = 'annotations'
+    __table_args__ = (
+        # SQLite does not index foreign keys on its own; this also serves
+        # annotations of one image in creation order without a sort
+        db.Index('ix_ann_image_created', 'image_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     image_id = db.Column(db.Integer, db.ForeignKey('images.id'), nullable=False)
@@ -21,52 +25,44 @@ class Annotations(db.Model):
 
     def to_dict(self):
         """Convert annotation record to dictionary."""
-        annotation_data = json.loads(self.data)
-        # Ensure the annotation has the correct structure for frontend
-        result = {
-            'type': self.annotation_type,
-            'id': annotation_data.get('id', str(self.id)),
-            'label': annotation_data.get('label', '')
-        }
+        return _build_annotation_dict(self.id, self.annotation_type, orjson.loads(self.data))
+
+
+def _build_annotation_dict(ann_id, annotation_type, annotation_data):
+    """Shape decoded annotation data for the frontend."""
+    result = {
+        'type': annotation_type,
+        'id': annotation_data.get('id', str(ann_id)),
+        'label': annotation_data.get('label', '')
+    }
+    
+    # Add type-specific properties
+    if annotation_type == 'box':
+        result.update({
+            'x': annotation_data.get('x', 0),
+            'y': annotation_data.get('y', 0),
+            'w': annotation_data.get('w', 0),
+            'h': annotation_data.get('h', 0)
+        })
+    elif annotation_type == 'polygon':
+        result['points'] = annotation_data.get('points', [])
         
-        # Add type-specific properties
-        if self.annotation_type == 'box':
-            result.update({
-                'x': annotation_data.get('x', 0),
-                'y': annotation_data.get('y', 0),
-                'w': annotation_data.get('w', 0),
-                'h': annotation_data.get('h', 0)
-            })
-        elif self.annotation_type == 'polygon':
-            result['points'] = annotation_data.get('points', [])
-            
-        return result
+    return result
 
 
 class AnnotationModel:
     """Model class for annotation operations (backward compatibility)."""
     
-    @staticmethod
-    def save_annotations(image_id, annotations):
-        """Save annotations for an image."""
-        # Clear existing annotations for this image
-        Annotations.query.filter_by(image_id=image_id).delete()
-        
-        # Save new annotations
-        for annotation in annotations:
-            new_annotation = Annotations(
-                image_id=image_id,
-                annotation_type=annotation.get('type', 'unknown'),
-                data=json.dumps(annotation),
-                created_at=datetime.now().isoformat()
-            )
-            db.session.add(new_annotation)
-        
-        db.session.commit()
-        return {'success': True, 'count': len(annotations)}
-    
     @staticmethod
     def get_annotations(image_id):
         """Get all annotations for an image."""
-        annotations = Annotations.query.filter_by(image_id=image_id).all()
-        return [ann.to_dict() for ann in annotations] 
\ No newline at end of file
+        # Plain column tuples; no ORM objects are built per row
+        rows = db.session.execute(
+            db.select(Annotations.id, Annotations.annotation_type, Annotations.data)
+            .where(Annotations.image_id == image_id)
+            .order_by(Annotations.created_at, Annotations.id)
+        ).all()
+        return [
+            _build_annotation_dict(ann_id, annotation_type, orjson.loads(data))
+            for ann_id, annotation_type, data in rows
+        ] 
\ No newline at end of file
@@ -6,14 +6,87 @@ This module handles SQLAlchemy database setup and initialization.
 """
 
 import os
+import sqlite3
+from contextlib import contextmanager
+from flask import g, has_request_context
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import Column, Index, Integer, MetaData, Table, event, text
+from sqlalchemy.engine import Engine
 from datetime import datetime
 
 # Initialize SQLAlchemy
 db = SQLAlchemy()
 
-def init_db():
-    """Initialize the database with required tables."""
+# Applied to every new SQLite connection: WAL lets reads run alongside a
+# write, NORMAL sync skips the fsync per commit that WAL does not need, and
+# mmap/cache keep hot pages out of read() syscalls.
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA cache_size=-65536',
+)
+
+@event.listens_for(Engine, 'connect')
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune SQLite connections as they are opened."""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+@contextmanager
+def raw_conn():
+    """Borrow a DB-API connection from the engine pool for prepared statements.
+    
+    Used by SQLite write paths that skip the ORM session; callers rely on
+    sqlite3 behaviour such as ``lastrowid``. Commits when the block
+    succeeds, rolls back when it raises, and returns the connection to the pool.
+    """
+    connection = db.engine.raw_connection()
+    try:
+        yield connection
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+def current_timestamp():
+    """Get the ISO timestamp for rows written by the current request.
+    
+    Computed once per request and reused, so every row of a batch shares
+    the same value. Outside a request a fresh timestamp is returned.
+    """
+    if not has_request_context():
+        return datetime.now().isoformat()
+    if 'now_iso' not in g:
+        g.now_iso = datetime.now().isoformat()
+    return g.now_iso
+
+# Stored in SQLite's user_version; bump it whenever tables or indexes change
+# so existing databases pick the change up on the next start
+SCHEMA_VERSION = 1
+
+def schema_is_current():
+    """Check whether the database already carries the current schema."""
+    if db.engine.dialect.name != 'sqlite':
+        return False
+    
+    with db.engine.connect() as connection:
+        return connection.execute(text('PRAGMA user_version')).scalar() == SCHEMA_VERSION
+
+def init_db(force=False):
+    """Initialize the database with required tables.
+    
+    Skipped once the schema version has been recorded, so a normal start
+    does no metadata queries; pass force=True to re-apply it anyway.
+    """
     try:
         from .image import Images
         from .annotation import Annotations
@@ -40,10 +113,28 @@ def init_db():
                 print(f"   Creating database directory: {db_dir}")
                 os.makedirs(db_dir, exist_ok=True)
         
+        if not force and schema_is_current():
+            print(f"   Schema version {SCHEMA_VERSION} is current, skipping table creation")
+            return
+        
         # Create all tables
         print("   Creating database tables...")
         db.create_all()
         
+        # create_all skips existing tables, so add indexes missing from older databases
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(db.engine, checkfirst=True)
+        
+        # Superseded by ix_ann_image_created, which has image_id as its prefix.
+        # Declared on a detached table so the models never create it again.
+        legacy_table = Table('annotations', MetaData(), Column('image_id', Integer))
+        Index('ix_annotations_image_id', legacy_table.c.image_id).drop(db.engine, checkfirst=True)
+        
+        if db.engine.dialect.name == 'sqlite':
+            with db.engine.begin() as connection:
+                connection.execute(text(f'PRAGMA user_version = {SCHEMA_VERSION}'))
+        
         print(f"✅ Database initialized successfully at {datetime.now()}")
         print("   Tables created:")
         print("   - images")
@@ -6,12 +6,41 @@ This module contains the Image model and related database operations.
 """
 
 import os
-from datetime import datetime
-from .database import db
+import hashlib
+import threading
+from cachetools import TTLCache
+from flask import current_app
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import selectinload
+from .database import db, current_timestamp, raw_conn
+
+INSERT_IMAGE_SQL = (
+    'INSERT INTO images (filename, original_filename, file_path, upload_time, width, height) '
+    'VALUES (:filename, :original_filename, :file_path, :upload_time, :width, :height)'
+)
+
+# Image rows rarely change after upload, so they are cached by id. Each app
+# gets its own cache, since in-memory databases all share the URL sqlite://
+IMAGE_CACHE_SIZE = 10_000
+IMAGE_CACHE_TTL = 300
+_image_cache_lock = threading.Lock()
+
+def _image_cache():
+    """Get the image cache of the current app, creating it on first use."""
+    cache = current_app.extensions.get('image_cache')
+    if cache is None:
+        with _image_cache_lock:
+            cache = current_app.extensions.setdefault(
+                'image_cache', TTLCache(maxsize=IMAGE_CACHE_SIZE, ttl=IMAGE_CACHE_TTL)
+            )
+    return cache
 
 class Images(db.Model):
     """Flask-SQLAlchemy model for images table."""
     __tablename__ = 'images'
+    __table_args__ = (
+        db.Index('ix_images_upload_time', 'upload_time'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     filename = db.Column(db.String(255), nullable=False)
@@ -22,7 +51,10 @@ class Images(db.Model):
     height = db.Column(db.Integer)
     
     # Relationship to annotations
-    annotations = db.relationship('Annotations', backref='image', lazy=True, cascade='all, delete-orphan')
+    annotations = db.relationship(
+        'Annotations', backref='image', lazy=True, cascade='all, delete-orphan',
+        order_by='[Annotations.created_at, Annotations.id]'
+    )
 
     def to_dict(self):
         """Convert image record to dictionary."""
@@ -43,34 +75,121 @@ class ImageModel:
     
     @staticmethod
     def create(filename, original_filename, file_path, width=None, height=None):
-        """Create a new image record."""
-        new_image = Images(
-            filename=filename,
-            original_filename=original_filename,
-            file_path=file_path,
-            upload_time=datetime.now().isoformat(),
-            width=width,
-            height=height
-        )
+        """Create a new image record.
+        
+        On SQLite the row is written with a prepared INSERT on a raw
+        connection; it is never read back, so there is no ORM object or
+        session flush to pay for. Other databases use a Core insert.
+        """
+        values = {
+            'filename': filename,
+            'original_filename': original_filename,
+            'file_path': file_path,
+            'upload_time': current_timestamp(),
+            'width': width,
+            'height': height
+        }
+        
+        if db.engine.dialect.name == 'sqlite':
+            with raw_conn() as conn:
+                cursor = conn.cursor()
+                cursor.execute(INSERT_IMAGE_SQL, values)
+                image_id = cursor.lastrowid
+                cursor.close()
+        else:
+            try:
+                result = db.session.execute(insert(Images).values(values))
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            image_id = result.inserted_primary_key[0]
         
-        db.session.add(new_image)
-        db.session.commit()
+        cache = _image_cache()
+        with _image_cache_lock:
+            cache.pop(image_id, None)
         
         return {
-            'image_id': new_image.id,
-            'filename': new_image.filename,
-            'original_filename': new_image.original_filename,
-            'url': f'/uploads/{new_image.filename}'
+            'image_id': image_id,
+            'filename': filename,
+            'original_filename': original_filename,
+            'url': f'/uploads/{filename}'
         }
     
     @staticmethod
-    def get_all():
-        """Get all images."""
-        images = Images.query.order_by(Images.upload_time.desc()).all()
-        return [img.to_dict() for img in images]
+    def get_all(limit=None, cursor_id=None):
+        """Get images, newest first.
+        
+        Pass ``limit`` and the id of the last image already seen as
+        ``cursor_id`` to page through the list. Rows are read as plain column
+        mappings rather than ORM objects.
+        """
+        query = select(
+            Images.id,
+            Images.filename,
+            Images.original_filename,
+            Images.file_path,
+            Images.upload_time,
+            Images.width,
+            Images.height
+        ).order_by(Images.id.desc())
+        
+        if cursor_id is not None:
+            query = query.where(Images.id < cursor_id)
+        if limit is not None:
+            query = query.limit(limit)
+        
+        return [
+            {**row, 'url': '/uploads/' + row['filename']}
+            for row in db.session.execute(query).mappings()
+        ]
+    
+    @staticmethod
+    def get_list_version():
+        """Get a fingerprint of the images table for conditional requests.
+        
+        Images are only ever added, so the row count, highest id and latest
+        upload time change whenever the image list does.
+        """
+        count, max_id, latest = db.session.query(
+            func.count(Images.id), func.max(Images.id), func.max(Images.upload_time)
+        ).one()
+        return hashlib.md5(f'{count}:{max_id}:{latest}'.encode()).hexdigest()
+    
+    @staticmethod
+    def get_all_with_annotations():
+        """Get all images together with their annotations.
+        
+        Annotations are eager-loaded with ``selectinload``, so the whole list
+        costs two queries instead of one per image.
+        """
+        images = (
+            db.session.query(Images)
+            .options(selectinload(Images.annotations))
+            .order_by(Images.id.desc())
+            .all()
+        )
+        result = []
+        for img in images:
+            image_data = img.to_dict()
+            image_data['annotations'] = [ann.to_dict() for ann in img.annotations]
+            result.append(image_data)
+        return result
     
     @staticmethod
     def get_by_id(image_id):
         """Get image by ID."""
+        cache = _image_cache()
+        with _image_cache_lock:
+            cached = cache.get(image_id)
+        if cached is not None:
+            return dict(cached)
+        
         image = Images.query.get(image_id)
-        return image.to_dict() if image else None 
\ No newline at end of file
+        if not image:
+            return None
+        
+        image_data = image.to_dict()
+        with _image_cache_lock:
+            cache[image_id] = image_data
+        return dict(image_data) 
\ No newline at end of file
@@ -0,0 +1,97 @@
+"""
+Annotation Service
+==================
+
+This module handles saving and loading annotations for images.
+"""
+
+import orjson
+from sqlalchemy import delete, insert, select
+from ..models import db, Annotations, AnnotationModel, current_timestamp, raw_conn
+
+# Rows handed to a single bulk insert
+INSERT_BATCH_SIZE = 10_000
+
+DELETE_ANNOTATIONS_SQL = 'DELETE FROM annotations WHERE image_id = :image_id'
+INSERT_ANNOTATION_SQL = (
+    'INSERT INTO annotations (image_id, annotation_type, data, created_at) '
+    'VALUES (:image_id, :annotation_type, :data, :created_at)'
+)
+
+BOX_FIELDS = ('x', 'y', 'w', 'h')
+
+class AnnotationService:
+    """Service for handling annotation operations."""
+    
+    @staticmethod
+    def save_annotations(image_id, annotations):
+        """Replace all annotations of an image."""
+        created_at = current_timestamp()
+        rows = [
+            {
+                'image_id': image_id,
+                'annotation_type': annotation.get('type', 'unknown'),
+                'data': orjson.dumps(annotation).decode(),
+                'created_at': created_at
+            }
+            for annotation in annotations
+        ]
+        
+        # One executemany per batch; the delete and inserts commit or roll
+        # back together. SQLite gets prepared statements on a raw connection.
+        if db.engine.dialect.name == 'sqlite':
+            with raw_conn() as conn:
+                cursor = conn.cursor()
+                cursor.execute(DELETE_ANNOTATIONS_SQL, {'image_id': image_id})
+                for start in range(0, len(rows), INSERT_BATCH_SIZE):
+                    cursor.executemany(INSERT_ANNOTATION_SQL, rows[start:start + INSERT_BATCH_SIZE])
+                cursor.close()
+        else:
+            try:
+                db.session.execute(delete(Annotations).where(Annotations.image_id == image_id))
+                for start in range(0, len(rows), INSERT_BATCH_SIZE):
+                    db.session.execute(insert(Annotations), rows[start:start + INSERT_BATCH_SIZE])
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+        
+        return {'success': True, 'count': len(annotations)}
+    
+    @staticmethod
+    def get_annotations(image_id):
+        """Get all annotations for an image."""
+        return AnnotationModel.get_annotations(image_id)
+    
+    @staticmethod
+    def get_annotations_json(image_id):
+        """Get all annotations for an image as an encoded JSON array.
+        
+        Encoded by orjson from the same dicts as ``get_annotations``, so
+        stored floats and booleans come back exactly as they were saved.
+        """
+        return orjson.dumps(AnnotationModel.get_annotations(image_id))
+    
+    @staticmethod
+    def get_export_annotations(image_id):
+        """Get the stored annotation payloads of an image for export.
+        
+        Reads only the type and JSON columns, skipping ORM hydration and the
+        frontend reshaping done by ``get_annotations``. Box coordinates
+        missing from the stored data default to 0, as they do there.
+        """
+        rows = db.session.execute(
+            select(Annotations.annotation_type, Annotations.data)
+            .where(Annotations.image_id == image_id)
+            .order_by(Annotations.created_at, Annotations.id)
+        )
+        
+        annotations = []
+        for annotation_type, data in rows:
+            annotation = orjson.loads(data)
+            annotation['type'] = annotation_type
+            if annotation_type == 'box':
+                for key in BOX_FIELDS:
+                    annotation.setdefault(key, 0)
+            annotations.append(annotation)
+        return annotations
@@ -6,11 +6,15 @@ This module handles file operations including upload, validation, and storage.
 """
 
 import os
-import uuid
-import magic
+import time
+from io import BytesIO
 from PIL import Image
 from werkzeug.utils import secure_filename
-from ..config.settings import UPLOAD_FOLDER, ALLOWED_EXTENSIONS
+from ..config.settings import UPLOAD_FOLDER, ALLOWED_EXTENSIONS, ALLOWED_MIME_TYPES
+from ..utils.image_header import read_dimensions
+from ..utils.mime import detect_mime
+
+MIME_SNIFF_SIZE = 4 * 1024
 
 class FileService:
     """Service for handling file operations."""
@@ -21,25 +25,28 @@ class FileService:
         try:
             # Generate unique filename
             original_filename = secure_filename(file.filename)
-            unique_filename = FileService._generate_unique_filename(original_filename)
+            unique_filename = FileService.generate_unique_filename(original_filename)
             file_path = os.path.join(UPLOAD_FOLDER, unique_filename)
             
-            # Ensure upload directory exists
-            os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-            
-            # Save file
-            file.save(file_path)
+            # Read the upload once; validation, metadata and the disk write
+            # all work from this buffer
+            data = file.stream.read()
             
-            # Validate MIME type
-            if not FileService._validate_mime_type(file_path):
-                os.remove(file_path)
+            # Validate MIME type before touching disk
+            if not FileService._validate_mime_type_buffer(data[:MIME_SNIFF_SIZE]):
                 return {
                     'success': False,
                     'error': 'Invalid file type detected during MIME validation'
                 }
             
             # Extract image metadata
-            width, height = FileService._get_image_dimensions(file_path)
+            width, height = FileService._get_image_dimensions(data)
+            
+            # Ensure upload directory exists
+            os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+            
+            # Save file
+            FileService._write_file(file_path, data)
             
             return {
                 'success': True,
@@ -56,29 +63,68 @@ class FileService:
             }
     
     @staticmethod
-    def _generate_unique_filename(original_filename):
+    def _write_file(file_path, data):
+        """Write data so the file only appears at its path once complete.
+        
+        On Linux the bytes go into an anonymous O_TMPFILE inode that is linked
+        into place afterwards; a failed write leaves nothing behind. Elsewhere
+        a temporary name is written and renamed over.
+        """
+        directory = os.path.dirname(file_path)
+        
+        if hasattr(os, 'O_TMPFILE'):
+            try:
+                FileService._write_anonymous(directory, file_path, data)
+                return
+            except OSError:
+                # Filesystem or sandbox without O_TMPFILE/linkat support
+                pass
+        
+        temp_path = os.path.join(directory, f".upload_{os.urandom(8).hex()}")
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, file_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    
+    @staticmethod
+    def _write_anonymous(directory, file_path, data):
+        """Write data to an unnamed inode in directory and link it as file_path."""
+        fd = os.open(directory, os.O_TMPFILE | os.O_WRONLY, 0o644)
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            os.link(f'/proc/self/fd/{fd}', file_path)
+        finally:
+            os.close(fd)
+    
+    @staticmethod
+    def generate_unique_filename(original_filename):
         """Generate unique filename while preserving extension."""
         name, ext = os.path.splitext(original_filename)
-        timestamp = str(uuid.uuid4())
-        return f"{name}_{timestamp}{ext}"
+        # Millisecond timestamp keeps names time-ordered; 48 random bits avoid clashes
+        return f"{name}_{int(time.time() * 1000):x}_{os.urandom(6).hex()}{ext}"
     
     @staticmethod
-    def _validate_mime_type(file_path):
-        """Validate file MIME type using python-magic."""
+    def _validate_mime_type_buffer(header):
+        """Validate file MIME type from its leading bytes."""
         try:
-            mime_type = magic.from_file(file_path, mime=True)
-            allowed_mime_types = [
-                'image/jpeg', 'image/png', 'image/gif', 'image/webp'
-            ]
-            return mime_type in allowed_mime_types
+            return detect_mime(header) in ALLOWED_MIME_TYPES
         except Exception:
             return False
     
     @staticmethod
-    def _get_image_dimensions(file_path):
-        """Extract image width and height."""
+    def _get_image_dimensions(data):
+        """Extract image width and height from the file contents."""
+        dimensions = read_dimensions(data)
+        if dimensions:
+            return dimensions
+        
         try:
-            with Image.open(file_path) as img:
+            with Image.open(BytesIO(data)) as img:
                 return img.width, img.height
         except Exception:
             return None, None
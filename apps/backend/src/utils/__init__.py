@@ -0,0 +1,12 @@
+"""
+Image Annotation Tool - Utilities
+=================================
+
+This module contains helper functions shared by the application.
+"""
+
+from .image_header import read_dimensions
+from .mime import detect_mime
+from .response import ojson
+
+__all__ = ['read_dimensions', 'detect_mime', 'ojson']
@@ -0,0 +1,95 @@
+"""
+Image Header Parsing
+====================
+
+This module reads image dimensions straight from the leading bytes of a
+PNG, JPEG, GIF or WebP file, without handing the data to an image decoder.
+"""
+
+import struct
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+JPEG_SIGNATURE = b'\xff\xd8'
+GIF_SIGNATURES = (b'GIF87a', b'GIF89a')
+VP8_START_CODE = b'\x9d\x01\x2a'
+
+# Start-of-frame markers carry the frame size; C4, C8 and CC are not frames
+JPEG_SOF_MARKERS = frozenset(
+    {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+)
+
+
+def read_dimensions(header):
+    """Return ``(width, height)`` parsed from an image header, or None.
+    
+    None means the format is not recognized or the size lies beyond the
+    given bytes; callers should then fall back to a full image library.
+    """
+    if header.startswith(PNG_SIGNATURE):
+        return _png_dimensions(header)
+    if header.startswith(JPEG_SIGNATURE):
+        return _jpeg_dimensions(header)
+    if header.startswith(GIF_SIGNATURES):
+        return _gif_dimensions(header)
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return _webp_dimensions(header)
+    return None
+
+
+def _png_dimensions(header):
+    """Read the size from the IHDR chunk, which must come first."""
+    if len(header) < 24 or header[12:16] != b'IHDR':
+        return None
+    return struct.unpack('>II', header[16:24])
+
+
+def _jpeg_dimensions(header):
+    """Walk JPEG marker segments until the first start-of-frame."""
+    offset = 2
+    while offset + 9 <= len(header):
+        if header[offset] != 0xFF:
+            return None
+        
+        marker = header[offset + 1]
+        if marker == 0xFF:
+            # Fill byte before a marker
+            offset += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            # Standalone markers have no length field
+            offset += 2
+            continue
+        
+        if marker in JPEG_SOF_MARKERS:
+            height, width = struct.unpack('>HH', header[offset + 5:offset + 9])
+            return width, height
+        
+        segment_length, = struct.unpack('>H', header[offset + 2:offset + 4])
+        offset += 2 + segment_length
+    return None
+
+
+def _gif_dimensions(header):
+    """Read the size from the logical screen descriptor."""
+    if len(header) < 10:
+        return None
+    return struct.unpack('<HH', header[6:10])
+
+
+def _webp_dimensions(header):
+    """Read the size from the first VP8, VP8L or VP8X chunk."""
+    if len(header) < 30:
+        return None
+    
+    chunk = header[12:16]
+    if chunk == b'VP8 ' and header[23:26] == VP8_START_CODE:
+        width, height = struct.unpack('<HH', header[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b'VP8L' and header[20] == 0x2F:
+        bits = int.from_bytes(header[21:25], 'little')
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b'VP8X':
+        width = int.from_bytes(header[24:27], 'little') + 1
+        height = int.from_bytes(header[27:30], 'little') + 1
+        return width, height
+    return None
@@ -0,0 +1,35 @@
+"""
+MIME Type Detection
+===================
+
+This module sniffs MIME types from in-memory file prefixes using puremagic.
+"""
+
+import puremagic
+
+# Signatures of the image types the app accepts, checked before puremagic
+IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+)
+
+UNKNOWN_MIME_TYPE = 'application/octet-stream'
+
+
+def detect_mime(buffer):
+    """Return the MIME type detected for ``buffer``."""
+    if not buffer:
+        return UNKNOWN_MIME_TYPE
+    
+    for signature, mime_type in IMAGE_SIGNATURES:
+        if buffer.startswith(signature):
+            return mime_type
+    if buffer[:4] == b'RIFF' and buffer[8:12] == b'WEBP':
+        return 'image/webp'
+    
+    try:
+        return puremagic.from_string(buffer, mime=True) or UNKNOWN_MIME_TYPE
+    except (puremagic.PureError, ValueError):
+        return UNKNOWN_MIME_TYPE
@@ -0,0 +1,17 @@
+"""
+JSON Responses
+==============
+
+This module builds JSON responses encoded with orjson.
+"""
+
+import orjson
+from flask import Response
+
+
+def ojson(obj):
+    """Return ``obj`` as an ``application/json`` response encoded by orjson.
+    
+    Already-encoded JSON can be embedded with ``orjson.Fragment``.
+    """
+    return Response(orjson.dumps(obj), mimetype='application/json')
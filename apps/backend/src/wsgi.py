@@ -0,0 +1,16 @@
+"""
+WSGI Entry Point
+================
+
+Production entry point for serving the app with Gunicorn and gevent workers:
+
+    gunicorn -k gevent -w 4 --worker-connections 1000 apps.backend.src.wsgi:app
+
+The gevent worker class patches the standard library before it loads this
+module, so socket reads during uploads yield to other requests instead of
+blocking the worker.
+"""
+
+from .app import create_app
+
+app = create_app()
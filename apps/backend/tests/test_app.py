@@ -1,24 +1,27 @@
-import os
 import tempfile
 import pytest
 import json
 from io import BytesIO
 from unittest.mock import patch, mock_open, MagicMock
 from PIL import Image
+from sqlalchemy.pool import StaticPool
 
 from app import create_app, db
 from models import Images, Annotations
+from utils import read_dimensions
 
 
 @pytest.fixture
 def app():
     """Create and configure a new app instance for each test."""
-    # Create a temporary file to serve as the test database
-    db_fd, db_path = tempfile.mkstemp()
-    
+    # In-memory database; StaticPool hands every session the same connection
     app = create_app({
         'TESTING': True,
-        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+        'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+        'SQLALCHEMY_ENGINE_OPTIONS': {
+            'connect_args': {'check_same_thread': False},
+            'poolclass': StaticPool,
+        },
         'SQLALCHEMY_TRACK_MODIFICATIONS': False,
         'UPLOAD_FOLDER': tempfile.mkdtemp(),
     })
@@ -28,9 +31,6 @@ def app():
 
     yield app
 
-    os.close(db_fd)
-    os.unlink(db_path)
-
 
 @pytest.fixture
 def client(app):
@@ -55,7 +55,7 @@ class TestImageUpload:
         img.save(img_bytes, format='JPEG')
         img_bytes.seek(0)
         
-        with patch('magic.from_buffer') as mock_magic:
+        with patch('app.detect_mime') as mock_magic:
             mock_magic.return_value = 'image/jpeg'
             
             response = client.post('/images/', data={
@@ -89,7 +89,7 @@ class TestImageUpload:
 
     def test_upload_invalid_file_type(self, client):
         """Test upload with invalid file type."""
-        with patch('magic.from_buffer') as mock_magic:
+        with patch('app.detect_mime') as mock_magic:
             mock_magic.return_value = 'text/plain'
             
             response = client.post('/images/', data={
@@ -116,7 +116,7 @@ class TestImageUpload:
         """Test upload with corrupted image."""
         mock_image_open.side_effect = Exception("Cannot identify image file")
         
-        with patch('magic.from_buffer') as mock_magic:
+        with patch('app.detect_mime') as mock_magic:
             mock_magic.return_value = 'image/jpeg'
             
             response = client.post('/images/', data={
@@ -172,6 +172,44 @@ class TestImageRetrieval:
         assert data['images'][0]['original_filename'] == 'test1.jpg'
         assert data['images'][1]['original_filename'] == 'test2.png'
 
+    def test_get_images_not_modified(self, client):
+        """Test conditional GET returns 304 when the image list is unchanged."""
+        response = client.get('/images/')
+        etag = response.headers['ETag']
+        
+        response = client.get('/images/', headers={'If-None-Match': etag})
+        
+        assert response.status_code == 304
+        assert response.data == b''
+
+    def test_get_images_with_annotations(self, client, app):
+        """Test getting images with their annotations embedded."""
+        with app.app_context():
+            image = Images(
+                filename='test.jpg',
+                original_filename='test.jpg',
+                file_path='/uploads/test.jpg',
+                upload_time='2023-01-01 12:00:00'
+            )
+            db.session.add(image)
+            db.session.commit()
+            
+            annotation = Annotations(
+                image_id=image.id,
+                annotation_type='box',
+                data=json.dumps({'x': 10, 'y': 20, 'w': 100, 'h': 50}),
+                created_at='2023-01-01 12:00:00'
+            )
+            db.session.add(annotation)
+            db.session.commit()
+        
+        response = client.get('/images/?include=annotations')
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert len(data[0]['annotations']) == 1
+        assert data[0]['annotations'][0]['type'] == 'box'
+
 
 class TestAnnotations:
     """Test annotation functionality."""
@@ -295,6 +333,48 @@ class TestAnnotations:
         assert len(data['annotations']) == 1
         assert data['annotations'][0]['type'] == 'box'
 
+    def test_get_annotations_preserves_values(self, client, app):
+        """Test that stored floats and booleans come back unchanged."""
+        with app.app_context():
+            image = Images(
+                filename='test.jpg',
+                original_filename='test.jpg',
+                file_path='/uploads/test.jpg',
+                upload_time='2023-01-01 12:00:00'
+            )
+            db.session.add(image)
+            db.session.commit()
+
+            annotation = Annotations(
+                image_id=image.id,
+                annotation_type='box',
+                data=json.dumps({
+                    'x': 0.30000000000000004,
+                    'y': 1234.5678901234567,
+                    'w': True,
+                    'h': 50,
+                    'label': 'test'
+                }),
+                created_at='2023-01-01 12:00:00'
+            )
+            db.session.add(annotation)
+            db.session.commit()
+            image_id = image.id
+
+        response = client.get(f'/images/{image_id}/annotations')
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data[0]['x'] == 0.30000000000000004
+        assert data[0]['y'] == 1234.5678901234567
+        assert data[0]['w'] is True
+
+        response = client.get(f'/images/{image_id}/download-annotations?format=json')
+
+        data = json.loads(response.data)
+        assert data['annotations'][0]['x'] == 0.30000000000000004
+        assert data['annotations'][0]['w'] is True
+
 
 class TestDownloadAnnotations:
     """Test annotation download functionality."""
@@ -384,6 +464,23 @@ class TestDownloadAnnotations:
         assert 'error' in data
 
 
+class TestImageHeader:
+    """Test header-only image dimension parsing."""
+    
+    @pytest.mark.parametrize('image_format', ['PNG', 'JPEG', 'GIF', 'WEBP'])
+    def test_read_dimensions(self, image_format):
+        """Test dimensions are read from the header of each allowed format."""
+        img = Image.new('RGB', (123, 45), color='red')
+        img_bytes = BytesIO()
+        img.save(img_bytes, format=image_format)
+        
+        assert read_dimensions(img_bytes.getvalue()[:4096]) == (123, 45)
+
+    def test_read_dimensions_unknown_format(self):
+        """Test unknown data is left to the PIL fallback."""
+        assert read_dimensions(b'not an image') is None
+
+
 class TestStaticFiles:
     """Test static file serving."""
     